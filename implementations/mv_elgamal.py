@@ -2,9 +2,19 @@
 Base class for MV ElGamal crypotsystem.
 """
 
-from random import randint
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+from os import cpu_count
 import implementations.number_theory as nt
 
+try:
+    from gmpy2 import mpz
+except ImportError:  # gmpy2 is optional; fall back to built-in integers.
+    mpz = int
+
+# The number of independent searches run when looking for a large prime.
+PRIME_SEARCH_WORKERS = 2
+
 
 class MVElGamal:
     """
@@ -53,16 +63,23 @@ class MVElGamal:
         ::
         """
 
-        if public_parameters is not None:
-            self._public_parameters = public_parameters
-            return None
+        # The fixed-base table of P is only built once encrypt needs it.
+        self._base_table: list[list[list[int]]] = None
 
-        self._public_parameters = self._mv_parameter_creation(self._bit_size)
+        if public_parameters is None:
+            public_parameters = self._mv_parameter_creation(self._bit_size)
+
+        [E, P, p] = public_parameters
+        self._public_parameters = [[int(c) for c in E], [int(c) for c in P], int(p)]
+
+        # With gmpy2, the curve arithmetic runs on these mpz copies; the
+        # getters still hand out plain ints.
+        self._mpz_parameters = [[mpz(c) for c in E], [mpz(c) for c in P], mpz(p)]
         return None
 
     def _set_keys(self) -> None:
         """Randomly generates a public and private key if none is supplied."""
-        keys = self._mv_key_creation(self._public_parameters)
+        keys = self._mv_key_creation(self._mpz_parameters)
         self._private_key: list[int] = keys[0]
         self._public_key: int = keys[1]
         return None
@@ -122,15 +139,22 @@ class MVElGamal:
         m1 = message[0 : len(message) // 2]
         m2 = message[len(message) // 2 : len(message)]
 
+        own_parameters = public_parameters == self._public_parameters
+        if own_parameters:
+            public_parameters = self._mpz_parameters
+
         [E, P, p] = public_parameters
         Q = public_key
 
         while True:
-            k = randint(2, p)
-            R = nt.double_and_add(P, k, E, p)
-            S = nt.double_and_add(Q, k, E, p)
+            k = nt.random_integer(2, p)
+            if own_parameters:
+                R = nt.fixed_base_multiply(self._get_base_table(), k, E, p)
+                S = nt.double_and_add(Q, k, E, p)
+            else:
+                [R, S] = nt.double_and_add_many([P, Q], k, E, p)
 
-            if R == "O" or S == "O":
+            if R is None or S is None:
                 continue
             else:
                 [xs, ys] = S
@@ -139,7 +163,7 @@ class MVElGamal:
                 else:
                     c1 = (xs * nt.text_to_int(m1)) % p
                     c2 = (ys * nt.text_to_int(m2)) % p
-                    return [R, c1, c2]
+                    return [[int(c) for c in R], int(c1), int(c2)]
 
     def decrypt(
         self,
@@ -152,19 +176,31 @@ class MVElGamal:
         :return: a string in English.
         """
 
-        [E, P, p] = self.get_public_parameters()
+        [E, P, p] = self._mpz_parameters
         [R, c1, c2] = cipher_text
         n = self._private_key
 
         [xt, yt] = nt.double_and_add(R, n, E, p)
 
-        xt_inverse = nt.get_mod_inverse(xt, p)
-        yt_inverse = nt.get_mod_inverse(yt, p)
+        [xt_inverse, yt_inverse] = nt.batch_inverse([xt, yt], p)
 
         m1_prime = (xt_inverse * c1) % p
         m2_prime = (yt_inverse * c2) % p
 
-        return nt.int_to_text(m1_prime) + nt.int_to_text(m2_prime)
+        return nt.int_to_text(int(m1_prime)) + nt.int_to_text(int(m2_prime))
+
+    def _get_base_table(self) -> list[list[list[int]]]:
+        """
+        Returns the `nt.fixed_base_table` of the public parameter P, building
+        it on first use. Encrypting under our own public parameters then
+        computes kP with additions only.
+        """
+
+        if self._base_table is None:
+            [E, P, p] = self._mpz_parameters
+            self._base_table = nt.fixed_base_table(P, E, p, p.bit_length())
+
+        return self._base_table
 
     def _message_length_ok(self, message: str) -> bool:
         """
@@ -181,10 +217,10 @@ class MVElGamal:
         """
 
         while True:
-            # Pick random point and random A.
-            x0 = randint(0, prime)
-            y0 = randint(1, prime)
-            A = randint(1, prime)
+            # Pick random point and random A, reduced mod `prime`.
+            x0 = nt.random_integer(0, prime - 1)
+            y0 = nt.random_integer(1, prime - 1)
+            A = nt.random_integer(1, prime - 1)
 
             # Now deduce what B must be.
             B = (y0**2 - x0**3 - A * x0) % prime
@@ -198,24 +234,58 @@ class MVElGamal:
             else:
                 return [E, P]
 
+    def _generate_prime(self, bit_size: int) -> int:
+        """
+        Generates a b-bit prime.
+
+        For large primes on a multicore machine, a few independent searches
+        run in parallel; the first prime found is used and the other
+        searches are told to stop.
+
+        :param bit_size: the number of bits the prime should be.
+        :return: a b-bit prime.
+        """
+
+        lower_bound = 2**bit_size
+        upper_bound = 2 ** (bit_size + 1)
+
+        if bit_size < nt.PARALLEL_PRIME_BIT_SIZE or (cpu_count() or 1) == 1:
+            return nt.find_prime(lower_bound, upper_bound)
+
+        with Manager() as manager:
+            stop_event = manager.Event()
+            with ProcessPoolExecutor(max_workers=PRIME_SEARCH_WORKERS) as executor:
+                futures = [
+                    executor.submit(nt.find_prime, lower_bound, upper_bound, stop_event)
+                    for _ in range(PRIME_SEARCH_WORKERS)
+                ]
+                done = wait(futures, return_when=FIRST_COMPLETED)[0]
+                stop_event.set()
+
+                return done.pop().result()
+
     def _mv_parameter_creation(self, bit_size: int) -> list[int | list[int]]:
         """
         Generates `bit_size` bit public_parameters for MV ElGamal cryptosystem.
         """
 
         # First create a prime of b bits.
-        p = nt.find_prime(2 ** (bit_size), 2 ** (bit_size + 1))
+        p = self._generate_prime(bit_size)
 
-        P = "O"
-        while P == "O":
+        while True:
             # Generate the parameters
             [E, P] = self._generate_elliptic_curve_and_point(p)
 
-            # Make sure P has order > 2.
-            if nt.add_points(P, P, E, p) == "O":
-                P = "O"
-            else:
-                return [E, P, p]
+            # Make sure P has order > 4. P is on E by construction.
+            P2 = nt.add_points_unchecked(P, P, E[0], p)
+            if P2 is None:
+                continue
+            if nt.add_points_unchecked(P2, P, E[0], p) is None:
+                continue
+            if nt.add_points_unchecked(P2, P2, E[0], p) is None:
+                continue
+
+            return [E, P, p]
 
     def _mv_key_creation(
         self, public_parameters: list[int | list[int]]
@@ -228,16 +298,16 @@ class MVElGamal:
 
         while True:
             # Choose a secret private_key (nA in notes):
-            private_key = randint(2, p)
+            private_key = nt.random_integer(2, p)
 
             # deduce the public_key:
             public_key = nt.double_and_add(P, private_key, E, p)
 
             # Make sure the public_key is useable!
-            if public_key == "O" or public_key[1] == 0:
+            if public_key is None or public_key[1] == 0:
                 continue
             else:
-                return [private_key, public_key]
+                return [int(private_key), [int(c) for c in public_key]]
 
 
 if __name__ == "__main__":
@@ -2,12 +2,80 @@
 Assorted number theoretic code to assist in cryptography calculations.
 """
 
+from math import gcd, prod
 from random import randint
+from secrets import randbelow
 
+try:
+    import gmpy2
+except ImportError:  # gmpy2 is optional; fall back to built-in integers.
+    gmpy2 = None
 
-def division_with_remainder(a, b):
-    """Long divides a/b to get [q, r] such that a = bq + r"""
-    return [(a - a % b) // b, a % b]
+
+def sieve_of_eratosthenes(n):
+    """
+    Returns a list of all primes p with p < n.
+    """
+
+    is_prime = [True] * max(n, 2)
+    is_prime[0] = is_prime[1] = False
+
+    for i in range(2, int(n**0.5) + 1):
+        if is_prime[i]:
+            is_prime[i * i :: i] = [False] * len(range(i * i, n, i))
+
+    return [i for i in range(n) if is_prime[i]]
+
+
+# The primes below 2000 and their product. Trial division by these rejects
+# about 85% of odd candidates before any Miller-Rabin round.
+SMALL_PRIMES = sieve_of_eratosthenes(2000)
+SMALL_PRIME_PROD = prod(SMALL_PRIMES)
+
+# The odd primes below 10000, used by find_prime to sieve runs of candidates.
+# Each one costs a single modular reduction per run, so this can be much
+# longer than SMALL_PRIMES, which is multiplied into one gcd per candidate.
+SIEVE_PRIMES = sieve_of_eratosthenes(10000)[1:]
+
+# Miller-Rabin with these bases correctly decides primality for every
+# n < FIXED_WITNESS_BOUND (Sorenson and Webster, 2015).
+FIXED_WITNESSES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+FIXED_WITNESS_BOUND = 3317044064679887385961981
+
+# Below 2^64 these seven bases (Sinclair, 2011) already suffice. A base
+# that is a multiple of n proves nothing and is skipped.
+WORD_WITNESSES = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+WORD_WITNESS_BOUND = 2**64
+
+# Pairs (bits, checks): for a randomly chosen odd candidate of at least that
+# many bits, this many Miller-Rabin rounds with random bases accept a
+# composite with probability below 2^-80 (Damgard, Landrock and Pomerance,
+# 1993; the table OpenSSL uses). Adversarial inputs only get the generic
+# (1/4)^checks bound, so this only applies to find_prime's own candidates.
+RANDOM_CANDIDATE_CHECKS = (
+    (3747, 3),
+    (1345, 4),
+    (476, 5),
+    (400, 6),
+    (347, 7),
+    (308, 8),
+    (55, 27),
+    (0, 34),
+)
+
+# Below this many bits, a prime search is not worth moving into worker
+# processes. At 1024 bits one search takes about 20-30ms with gmpy2 and
+# 200ms without, against about 6ms to fork a pool of two (15ms with a
+# Manager for the stop event). Platforms that spawn pay nearer 100ms.
+PARALLEL_PRIME_BIT_SIZE = 1024
+
+
+def random_integer(a, b):
+    """
+    Returns a uniformly random integer x with a <= x <= b, drawn from the
+    operating system's cryptographically secure random number generator.
+    """
+    return a + randbelow(b - a + 1)
 
 
 def extended_gcd(a, b):
@@ -17,18 +85,11 @@ def extended_gcd(a, b):
     introduced in Problem 1.12 of Hoffstein, et al.
     """
 
-    u = 1
-    g = a
-    x = 0
-    y = b
+    u, g, x, y = 1, a, 0, b
 
     while y != 0:
-        [q, t] = division_with_remainder(g, y)
-        s = u - q * x
-        u = x
-        g = y
-        x = s
-        y = t
+        q, t = divmod(g, y)
+        u, g, x, y = x, y, u - q * x, t
 
     v = (g - a * u) // b
     return [g, u, v]
@@ -39,12 +100,41 @@ def get_mod_inverse(a, p):
     Returns the inverse of a mod p.
     """
 
-    [g, u, v] = extended_gcd(a, p)
+    # Both run a C-level extended GCD; GMP's is the faster of the two.
+    try:
+        if gmpy2 is not None:
+            return int(gmpy2.invert(a, p))
+        return pow(a, -1, p)
+    except (ValueError, ZeroDivisionError):
+        raise ValueError("Arguments of get_mod_inverse are not coprime!") from None
+
+
+def batch_inverse(values, p):
+    """
+    Returns the list of inverses mod p of the numbers in `values`, using
+    Montgomery's trick: a single get_mod_inverse of the product of all the
+    values, followed by 3(n-1) multiplications to unwind it.
+    """
+
+    if len(values) == 0:
+        return []
 
-    if g != 1:
-        raise ValueError("Arguments of get_mod_inverse are not coprime!")
+    # prefix[i] = values[0] * ... * values[i] (mod p)
+    prefix = []
+    running = 1
+    for v in values:
+        running = (running * v) % p
+        prefix.append(running)
 
-    return u % p
+    inverse = get_mod_inverse(running, p)
+
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = (inverse * prefix[i - 1]) % p
+        inverse = (inverse * values[i]) % p
+    inverses[0] = inverse
+
+    return inverses
 
 
 def fast_power(g, A, N):
@@ -58,92 +148,157 @@ def fast_power(g, A, N):
         g = get_mod_inverse(g, N)
         A = -A
 
-    a = g
-    b = 1
-
-    while A > 0:
-        if A % 2 == 1:
-            b = (b * a) % N
+    # GMP's powmod beats CPython's bignum arithmetic at cryptographic sizes;
+    # otherwise the built-in three-argument pow runs a windowed
+    # square-and-multiply in C, which is far faster than a Python loop.
+    if gmpy2 is not None:
+        return int(gmpy2.powmod(g, A, N))
 
-        a = a**2 % N
-        A = A // 2
-
-    return b
+    return pow(g, A, N)
 
 
 def text_to_int(w):
     """
     Takes in a string and returns an integer using the ASCII dictionary.
+    The characters are read as little-endian base-256 digits.
     """
-    n = 0
-    for i in range(len(w)):
-        n += ord(w[i]) * 256**i
-    return n
+    return int.from_bytes(w.encode("latin-1"), "little")
 
 
 def int_to_text(n):
     """
     Takes in an integer and returns its corresponding string using the
-    ASCII dictionary without storing a base-256 expansion.
+    ASCII dictionary. This is the inverse of text_to_int.
     """
+    return n.to_bytes((n.bit_length() + 7) // 8, "little").decode("latin-1")
 
-    text = ""
-    x = n
-    i = 0
 
-    while x != 0:
-        [x, r] = division_with_remainder(x, 256)
-        text += chr(r)
-        if x == 0:
-            return text
-        i += 1
+def to_base(n, base):
+    """
+    Returns the digits [d_0, d_1, ...] of n in the given base, least
+    significant first, so that n = d_0 + d_1 * base + d_2 * base^2 + ...
+    Zero has no digits.
+    """
+
+    if n < 0:
+        raise ValueError("Only non-negative integers have digits.")
+    if base < 2:
+        raise ValueError("The base must be at least 2.")
 
+    digits = []
+    while n != 0:
+        n, r = divmod(n, base)
+        digits.append(r)
+    return digits
 
-def miller_rabin(a, n):
+
+def from_base(digits, base):
+    """
+    Returns the integer whose digits in the given base are `digits`, least
+    significant first. This is the inverse of to_base.
+    """
+
+    n = 0
+    for d in reversed(digits):
+        n = n * base + d
+    return n
+
+
+def two_adic_decomposition(n):
+    """
+    Returns [k, q] with q odd such that n = 2^k * q, for n > 0.
+    """
+
+    # n & -n isolates the lowest set bit of n, i.e. 2^k.
+    k = (n & -n).bit_length() - 1
+    return [k, n >> k]
+
+
+def miller_rabin(a, n, k=None, q=None):
     """
     If a is a Miller-Rabin witness for n, return True. Else, False.
     This is used to probabilistically generate prime numbers.
+
+    When testing several witnesses against the same n, the decomposition
+    n-1 = 2^k * q can be computed once and passed in as k and q.
     """
 
     # False == Potentially prime
     # True  == Miller-Rabin Witness -> Definitely composite
 
     # Write n-1 = 2^k * q where q is odd.
-    k = 0
-    q = n - 1
-    while q % 2 == 0:
-        k += 1
-        q = q // 2
-
-    x = fast_power(a, q, n)
+    if k is None or q is None:
+        [k, q] = two_adic_decomposition(n - 1)
+
+    # With gmpy2, keep n as an mpz so that the squarings below also run in
+    # GMP rather than converting back to a Python int first.
+    if gmpy2 is not None:
+        n = gmpy2.mpz(n)  # Cheap when probably_prime already converted n.
+        x = gmpy2.powmod(a, q, n)
+    else:
+        x = pow(a, q, n)
 
     # Is a^m = 1 mod n? Then a is not a witness
     if x == 1:
         return False
 
+    # Square with a plain product and a single reduction by n; each step
+    # is then one multiplication and one division in C.
+    n_minus_one = n - 1
     power_of_x = x
     for i in range(k):
         # Is this p-1 mod n? If so, not a witness
-        if power_of_x == n - 1:
+        if power_of_x == n_minus_one:
             return False
-        power_of_x = (power_of_x**2) % n
+        power_of_x = power_of_x * power_of_x % n
 
     # If we've made it here, the number is a witness.
     return True
 
 
-def probably_prime(n):
+def probably_prime(n, number_of_checks=20, trial_division=True):
     """
-    Uses Miller-Rabin Witness test a fixed number of times to
+    Uses Miller-Rabin Witness test `number_of_checks` times to
     probablistically determine whether or not input is prime.
+    Inputs below FIXED_WITNESS_BOUND are decided deterministically, with
+    only seven rounds below WORD_WITNESS_BOUND. Larger inputs use gmpy2's
+    primality test (BPSW) instead, when it is installed.
+
+    Pass trial_division=False for odd n already sieved by the odd primes
+    below 2000, such as find_prime's candidates.
     """
 
-    from random import randint
+    # Small inputs are decided exactly, larger ones sharing a factor with
+    # SMALL_PRIME_PROD are definitely composite.
+    if n <= SMALL_PRIMES[-1]:
+        return n in SMALL_PRIMES
+    if trial_division and gcd(n, SMALL_PRIME_PROD) != 1:
+        return False
+
+    [k, q] = two_adic_decomposition(n - 1)
+
+    # Convert once per candidate rather than once per witness.
+    if gmpy2 is not None:
+        n, q = gmpy2.mpz(n), gmpy2.mpz(q)
+
+    if n < WORD_WITNESS_BOUND:
+        for x in WORD_WITNESSES:
+            if x % n != 0 and miller_rabin(x, n, k, q):
+                return False
+        return True
+
+    if n < FIXED_WITNESS_BOUND:
+        for x in FIXED_WITNESSES:
+            if miller_rabin(x, n, k, q):
+                return False
+        return True
+
+    if gmpy2 is not None:
+        return bool(gmpy2.is_prime(n))
 
-    number_of_checks = 20
     for i in range(number_of_checks):
         x = randint(2, n - 1)
-        Witness = miller_rabin(x, n)
+        Witness = miller_rabin(x, n, k, q)
 
         # Is x a witness? If so, n is definitely composite.
         if Witness == True:
@@ -154,23 +309,67 @@ def probably_prime(n):
     return True
 
 
-def find_prime(lower_bound, upper_bound):
+def random_candidate_checks(bits):
+    """
+    Returns the number of Miller-Rabin rounds that RANDOM_CANDIDATE_CHECKS
+    prescribes for random odd candidates of the given number of bits.
+    """
+
+    for [min_bits, checks] in RANDOM_CANDIDATE_CHECKS:
+        if bits >= min_bits:
+            return checks
+
+
+def find_prime(lower_bound, upper_bound, stop_event=None):
     """
     Uses probably_prime and a random number generator to produce a prime.
+    Starting from a random odd number, a run of consecutive odd candidates
+    is sieved by SIEVE_PRIMES, so that probably_prime is only called on
+    candidates with no factor below 10000.
 
     Inputs:
     --- lower_bound
     --- upper_bound
+    --- stop_event (optional): an Event checked before each run of
+        candidates, so that a parallel search can be called off.
 
     Output:
     --- a number between lower_bound and upper_bound which is very likely
-        to be prime.
+        to be prime, or None if stop_event was set first.
     """
 
+    # Enough odd candidates to cover several average prime gaps, which
+    # grow like ln(upper_bound).
+    sieve_length = max(upper_bound.bit_length(), 64)
+
+    # The candidates are random, so far fewer rounds than the default do.
+    number_of_checks = random_candidate_checks(lower_bound.bit_length())
+
     while True:
-        potential_prime = randint(lower_bound, upper_bound)
-        if probably_prime(potential_prime):
-            return potential_prime
+        if stop_event is not None and stop_event.is_set():
+            return None
+
+        start = random_integer(lower_bound, upper_bound) | 1
+
+        # sieve[j] is set when start + 2j has a small prime factor.
+        sieve = bytearray(sieve_length)
+        for p in SIEVE_PRIMES:
+            # Solve start + 2j = 0 (mod p); (p + 1) // 2 is 2^(-1) mod p.
+            j = (-start * ((p + 1) // 2)) % p
+            if start + 2 * j == p:
+                j += p
+            sieve[j::p] = b"\x01" * len(range(j, sieve_length, p))
+
+        # Jump straight from one unstruck candidate to the next.
+        j = sieve.find(0)
+        while j != -1:
+            potential_prime = start + 2 * j
+            if potential_prime > upper_bound:
+                break
+            # The sieve already covers SMALL_PRIMES, so skip their gcd.
+            if probably_prime(potential_prime, number_of_checks, False):
+                return potential_prime
+            j = sieve.find(0, j + 1)
 
 
 def is_elliptic(E, p):
@@ -184,9 +383,9 @@ def is_elliptic(E, p):
 
 def on_curve(P, E, p):
 
-    # Check if P is the point at infinity
-    if P == "O":
-        # 'O' is only on *elliptic* curves
+    # Check if P is the point at infinity, represented by None
+    if P is None:
+        # O is only on *elliptic* curves
         if is_elliptic(E, p):
             return True
         else:
@@ -207,7 +406,7 @@ def on_curve(P, E, p):
 def add_points(P, Q, E, p):
     """
     Adds two points on an elliptic curve.
-    (If one of the points is O, input as +Infinity)
+    (If one of the points is O, input it as None)
 
     Inputs:
     --- E: [a, b], coefficients of elliptic curve y^2 = x^3 + ax + b;
@@ -225,50 +424,327 @@ def add_points(P, Q, E, p):
     if on_curve(Q, E, p) == False:
         raise ValueError("Second argument " + str(Q) + " is not a point on E.")
 
-    O = "O"
+    # Reduce the inputs mod p, just in case.
+    if P is not None:
+        P = (P[0] % p, P[1] % p)
+    if Q is not None:
+        Q = (Q[0] % p, Q[1] % p)
+
+    return add_points_unchecked(P, Q, E[0], p)
+
+
+def add_points_unchecked(P, Q, a, p):
+    """
+    Adds two points on an elliptic curve y^2 = x^3 + ax + b, like
+    add_points, but without checking that P and Q lie on the curve. Use it
+    only on points already known to be on the curve, with coordinates
+    already reduced mod p. The coefficient b does not enter the addition
+    formulas, so only a is needed.
+    """
 
     # Is P or Q the point at infinity?
-    if P == O:
+    if P is None:
         return Q
-    if Q == O:
+    if Q is None:
         return P
 
-    [a, b] = E
     [x1, y1] = P
     [x2, y2] = Q
 
-    # Reduce the inputs mod p, just in case.
-    x1 = x1 % p
-    x2 = x2 % p
-    y1 = y1 % p
-    y2 = y2 % p
-
     # Implement the algorithm from class.
-    if x1 == x2 and y1 == (p - y2) % p:
-        return O
+    if x1 == x2 and (y1 + y2) % p == 0:
+        return None
     else:
         if x1 != x2:
-            L = get_mod_inverse((x2 - x1), p) * (y2 - y1)
+            L = get_mod_inverse((x2 - x1), p) * (y2 - y1) % p
         else:
-            L = get_mod_inverse(2 * y1, p) * (3 * x1**2 + a)
+            L = get_mod_inverse(2 * y1, p) * (3 * x1 * x1 + a) % p
+
+    x3 = (L * L - x1 - x2) % p
+    y3 = (L * (x1 - x3) - y1) % p
+
+    return (x3, y3)
+
+
+def jacobian_double(P, a, p):
+    """
+    Doubles a point on y^2 = x^3 + ax + b given in Jacobian coordinates.
+
+    Inputs:
+    --- P: (X, Y, Z), standing for the affine point (X/Z^2, Y/Z^3);
+           Z = 0 is the point at infinity;
+    --- a: the coefficient a of the elliptic curve;
+    --- p: a prime > 2.
+
+    Output:
+    --- The point 2P in Jacobian coordinates.
+    """
+
+    [X, Y, Z] = P
+
+    if Z == 0 or Y == 0:
+        return (1, 1, 0)
+
+    YY = (Y * Y) % p
+    S = (4 * X * YY) % p
+    M = (3 * X * X + a * pow(Z, 4, p)) % p
+
+    X3 = (M * M - 2 * S) % p
+    Y3 = (M * (S - X3) - 8 * YY * YY) % p
+    Z3 = (2 * Y * Z) % p
+
+    return (X3, Y3, Z3)
+
+
+def jacobian_add(P, Q, a, p):
+    """
+    Adds a point in Jacobian coordinates to an affine point ("mixed
+    addition"), which avoids any modular inversion.
+
+    Inputs:
+    --- P: (X, Y, Z), a point in Jacobian coordinates;
+    --- Q: (x, y), an affine point, or None for O;
+    --- a: the coefficient a of the elliptic curve;
+    --- p: a prime > 2.
+
+    Output:
+    --- The point P + Q in Jacobian coordinates.
+    """
+
+    if Q is None:
+        return P
+
+    [X1, Y1, Z1] = P
+    [x2, y2] = Q
+
+    if Z1 == 0:
+        return (x2 % p, y2 % p, 1)
+
+    Z1Z1 = (Z1 * Z1) % p
+    H = (x2 * Z1Z1 - X1) % p
+    r = (y2 * Z1 * Z1Z1 - Y1) % p
+
+    # Equal x-coordinates: either P = Q, or P = -Q and the sum is O.
+    if H == 0:
+        if r == 0:
+            return jacobian_double(P, a, p)
+        return (1, 1, 0)
+
+    HH = (H * H) % p
+    HHH = (H * HH) % p
+    V = (X1 * HH) % p
+
+    X3 = (r * r - HHH - 2 * V) % p
+    Y3 = (r * (V - X3) - Y1 * HHH) % p
+    Z3 = (Z1 * H) % p
+
+    return (X3, Y3, Z3)
 
-    L = L % p
-    x3 = L**2 - x1 - x2
-    y3 = L * (x1 - x3) - y1
 
-    return [x3 % p, y3 % p]
+def jacobian_to_affine(P, p):
+    """
+    Converts a point (X, Y, Z) in Jacobian coordinates to the affine point
+    (X/Z^2, Y/Z^3), using a single modular inversion. Z = 0 gives None, the
+    point at infinity.
+    """
+
+    [X, Y, Z] = P
 
+    if Z == 0:
+        return None
 
-def double_and_add(P, n, E, p):
+    Z_inverse = get_mod_inverse(Z, p)
+    Z_inverse_squared = (Z_inverse * Z_inverse) % p
 
-    a = P
-    nP = "O"
+    return ((X * Z_inverse_squared) % p, (Y * Z_inverse_squared * Z_inverse) % p)
+
+
+def wnaf(n, w):
+    """
+    Returns the width-w non-adjacent form of a non-negative integer n:
+    digits [d_0, d_1, ...], least significant first, with
+    n = sum of d_i * 2^i, where every non-zero digit is odd, lies strictly
+    between -2^(w-1) and 2^(w-1), and is followed by at least w-1 zeros.
+    """
+
+    digits = []
 
     while n > 0:
-        if n % 2 == 1:
-            nP = add_points(nP, a, E, p)
+        # Emit a whole run of zero digits with a single shift, so the big
+        # integer n is only touched about once per non-zero digit.
+        zeros = (n & -n).bit_length() - 1
+        digits.extend([0] * zeros)
+        n >>= zeros
+
+        d = n & (2**w - 1)
+        if d >= 2 ** (w - 1):
+            d -= 2**w
+        n -= d
+
+        digits.append(d)
+        n >>= 1
+
+    return digits
 
-        a = add_points(a, a, E, p)
-        n = n // 2
 
-    return nP
+def jacobian_to_affine_batch(points, p):
+    """
+    Converts a list of points in Jacobian coordinates to affine coordinates
+    like jacobian_to_affine, but with one batch_inverse for all of them.
+    """
+
+    inverses = iter(batch_inverse([Z for [X, Y, Z] in points if Z != 0], p))
+
+    affine_points = []
+    for [X, Y, Z] in points:
+        if Z == 0:
+            affine_points.append(None)
+            continue
+
+        Z_inverse = next(inverses)
+        Z_inverse_squared = (Z_inverse * Z_inverse) % p
+        affine_points.append(
+            ((X * Z_inverse_squared) % p, (Y * Z_inverse_squared * Z_inverse) % p)
+        )
+
+    return affine_points
+
+
+def wnaf_table(P, a, p, w):
+    """
+    Returns the odd multiples [P, 3P, 5P, ..., (2^(w-1) - 1)P] of a point
+    P other than O, in affine coordinates, as used by double_and_add.
+
+    Only 2P is made affine on its own; the other entries are built in
+    Jacobian coordinates by mixed additions of 2P and then converted with a
+    single batch_inverse, so the table costs two modular inversions at any w.
+    """
+
+    P = (P[0] % p, P[1] % p)
+    P2 = jacobian_to_affine(jacobian_double(P + (1,), a, p), p)
+
+    table = [P + (1,)]
+    for i in range(2 ** (w - 2) - 1):
+        table.append(jacobian_add(table[-1], P2, a, p))
+
+    return jacobian_to_affine_batch(table, p)
+
+
+def double_and_add(P, n, E, p, w=4):
+    """
+    Computes the multiple nP of a point on an elliptic curve.
+
+    The scalar is written in width-w non-adjacent form, so on average only
+    one in w+1 digits is non-zero, and the odd multiples P, 3P, ...,
+    (2^(w-1) - 1)P are precomputed. The digits are then read from the most
+    significant end, doubling at every digit and adding (or subtracting) a
+    table entry at every non-zero digit. The running point is kept in
+    Jacobian coordinates, so no modular inversion is needed inside the loop.
+
+    Inputs:
+    --- P: a point on E;
+    --- n: a non-negative integer;
+    --- E: [a, b], coefficients of elliptic curve y^2 = x^3 + ax + b;
+    --- p: a prime > 2;
+    --- w: the window width, at least 2.
+
+    Output:
+    --- The point nP on E.
+    """
+
+    return double_and_add_many([P], n, E, p, w)[0]
+
+
+def double_and_add_many(points, n, E, p, w=4):
+    """
+    Computes the multiples [nP for P in points] of several points on the
+    same elliptic curve by the same scalar, as in double_and_add.
+
+    All the points share a single wNAF recoding of n and a single pass over
+    its digits, and the results are brought back to affine coordinates with
+    one modular inversion in total. MV ElGamal encryption uses this to
+    compute kP and kQ together.
+    """
+
+    for P in points:
+        if on_curve(P, E, p) == False:
+            raise ValueError("Argument " + str(P) + " is not a point on E.")
+
+    if n <= 0:
+        return [None] * len(points)
+
+    [a, b] = E
+
+    # The point at infinity stays at infinity; it gets no table.
+    tables = [None if P is None else wnaf_table(P, a, p, w) for P in points]
+    multiples = [(1, 1, 0) for P in points]
+
+    for d in reversed(wnaf(n, w)):
+        for i in range(len(points)):
+            multiples[i] = jacobian_double(multiples[i], a, p)
+
+            if d == 0 or tables[i] is None:
+                continue
+
+            T = tables[i][abs(d) // 2]
+            if d < 0 and T is not None:
+                T = (T[0], p - T[1])
+            multiples[i] = jacobian_add(multiples[i], T, a, p)
+
+    return jacobian_to_affine_batch(multiples, p)
+
+
+def fixed_base_table(P, E, p, bits, w=4):
+    """
+    Precomputes the table used by fixed_base_multiply to compute multiples
+    nP of a fixed point P for any 0 <= n < 2^bits without any doublings.
+
+    Output:
+    --- table[i][j] = j * 2^(w*i) * P in affine coordinates, for
+        0 <= i < ceil(bits / w) and 0 <= j < 2^w.
+    """
+
+    if on_curve(P, E, p) == False:
+        raise ValueError("Argument " + str(P) + " is not a point on E.")
+
+    [a, b] = E
+
+    table = []
+    base = P
+    for i in range((bits + w - 1) // w):
+        # row[j] = j * base, built by repeatedly adding the affine base.
+        row = [(1, 1, 0)]
+        for j in range(2**w):
+            row.append(jacobian_add(row[-1], base, a, p))
+
+        # The last entry is 2^w * base, the base of the next row.
+        row = jacobian_to_affine_batch(row, p)
+        base = row.pop()
+        table.append(row)
+
+    return table
+
+
+def fixed_base_multiply(table, n, E, p, w=4):
+    """
+    Computes nP from the fixed_base_table of P, by splitting n into w-bit
+    digits n_i and adding up the table entries table[i][n_i]. This costs
+    one mixed addition per non-zero digit and no doublings.
+    """
+
+    if n < 0 or n >> (w * len(table)) != 0:
+        raise ValueError("The scalar " + str(n) + " is out of range for the table.")
+
+    [a, b] = E
+    mask = 2**w - 1
+
+    nP = (1, 1, 0)
+    i = 0
+    while n > 0:
+        d = n & mask
+        if d != 0:
+            nP = jacobian_add(nP, table[i][d], a, p)
+        n >>= w
+        i += 1
+
+    return jacobian_to_affine(nP, p)
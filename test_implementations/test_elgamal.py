@@ -3,6 +3,11 @@ import pytest
 from implementations.mv_elgamal import MVElGamal
 
 
+@pytest.fixture(scope="module")
+def encryptor():
+    return MVElGamal(bit_size=1024)
+
+
 @pytest.mark.parametrize(
     "plain_text",
     [
@@ -13,8 +18,7 @@ from implementations.mv_elgamal import MVElGamal
     ],
     ids=["english", "lorem", "special_characters"],
 )
-def test_elgamal(plain_text):
-    encryptor = MVElGamal(bit_size=1024)
+def test_elgamal(encryptor, plain_text):
     encrypted_text = encryptor.encrypt(
         message=plain_text,
         public_parameters=encryptor.get_public_parameters(),
@@ -24,3 +28,10 @@ def test_elgamal(plain_text):
         cipher_text=encrypted_text,
     )
     assert output == plain_text
+
+
+def test_elgamal_getters_return_ints(encryptor):
+    [E, P, p] = encryptor.get_public_parameters()
+    values = E + P + [p] + list(encryptor.get_public_key())
+    values.append(encryptor.get_private_key())
+    assert all(type(value) is int for value in values)
@@ -0,0 +1,123 @@
+from itertools import islice
+from math import gcd
+import threading
+
+import pytest
+
+import implementations.number_theory as nt
+
+
+def test_probably_prime_small_numbers():
+    primes = set(nt.sieve_of_eratosthenes(5000))
+    for n in range(2, 5000):
+        assert nt.probably_prime(n) == (n in primes)
+
+
+@pytest.mark.parametrize(
+    "n, expected",
+    [
+        (3215031751, False),  # Strong pseudoprime to bases 2, 3, 5, 7.
+        (3825123056546413051, False),  # Strong pseudoprime to bases up to 23.
+        (318665857834031151167461, False),  # ... and to bases up to 37.
+        (2**61 - 1, True),
+        (2**64 - 59, True),
+        (2**89 - 1, True),
+    ],
+)
+def test_probably_prime_deterministic_range(n, expected):
+    assert nt.probably_prime(n) == expected
+
+
+def test_random_candidate_checks():
+    checks = [nt.random_candidate_checks(bits) for bits in range(0, 5000)]
+    assert checks == sorted(checks, reverse=True)
+    assert nt.random_candidate_checks(512) == 5
+    assert nt.random_candidate_checks(2048) == 4
+
+
+@pytest.mark.parametrize("bit_size", [2, 16, 64, 512])
+def test_find_prime(bit_size):
+    lower_bound, upper_bound = 2**bit_size, 2 ** (bit_size + 1) - 1
+    prime = nt.find_prime(lower_bound, upper_bound)
+    assert lower_bound <= prime <= upper_bound
+    assert nt.probably_prime(prime)
+
+
+@pytest.mark.parametrize("a, b", [(240, 46), (17, 3120), (2**127 - 1, 2**89 - 1)])
+def test_extended_gcd(a, b):
+    [g, u, v] = nt.extended_gcd(a, b)
+    assert g == gcd(a, b)
+    assert a * u + b * v == g
+
+
+@pytest.mark.parametrize("n, base", [(-1, 256), (255, 1)])
+def test_to_base_invalid(n, base):
+    with pytest.raises(ValueError):
+        nt.to_base(n, base)
+
+
+E = [2, 3]
+
+
+def curve_points(p, count=1):
+    points = (
+        [x, y] for x in range(1, p) for y in range(1, p) if nt.on_curve([x, y], E, p)
+    )
+    return list(islice(points, count))
+
+
+def affine_multiple(P, n, E, p):
+    nP = None
+    for i in range(n):
+        nP = nt.add_points(nP, P, E, p)
+    return nP
+
+
+@pytest.mark.parametrize("w", [2, 4, 5])
+@pytest.mark.parametrize("p", [97, 10007])
+def test_double_and_add(p, w):
+    [P] = curve_points(p)
+    for n in range(0, 120):
+        assert nt.double_and_add(P, n, E, p, w) == affine_multiple(P, n, E, p)
+
+
+def test_wnaf():
+    for n in range(1000):
+        digits = nt.wnaf(n, 4)
+        assert sum(d * 2**i for i, d in enumerate(digits)) == n
+        assert all(d % 2 == 1 and -8 < d < 8 for d in digits if d != 0)
+
+
+def test_batch_inverse():
+    p = 10007
+    values = [1, 2, 5000, 10006, 12345]
+    inverses = nt.batch_inverse(values, p)
+    assert inverses == [nt.get_mod_inverse(v, p) for v in values]
+    assert nt.batch_inverse([], p) == []
+
+
+def test_double_and_add_many():
+    p = 10007
+    points = curve_points(p, 3) + [None]
+    for n in [0, 1, 7, 1234]:
+        expected = [nt.double_and_add(P, n, E, p) for P in points]
+        assert nt.double_and_add_many(points, n, E, p) == expected
+
+
+@pytest.mark.parametrize("w", [1, 4])
+def test_fixed_base_multiply(w):
+    p = 10007
+    [P] = curve_points(p)
+    table = nt.fixed_base_table(P, E, p, p.bit_length(), w)
+    for n in [0, 1, 2, 15, 16, 255, 9999, p]:
+        assert nt.fixed_base_multiply(table, n, E, p, w) == nt.double_and_add(
+            P, n, E, p
+        )
+    with pytest.raises(ValueError):
+        nt.fixed_base_multiply(table, 2 ** (w * len(table)), E, p, w)
+
+
+def test_find_prime_stop_event():
+    stop_event = threading.Event()
+    stop_event.set()
+    assert nt.find_prime(2**64, 2**65 - 1, stop_event) is None
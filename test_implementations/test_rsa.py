@@ -1,8 +1,14 @@
 import pytest
 
+import implementations.number_theory as nt
 from implementations.rsa import RSA
 
 
+@pytest.fixture(scope="module")
+def encryptor():
+    return RSA(bit_size=512)
+
+
 @pytest.mark.parametrize(
     "plain_text",
     [
@@ -13,9 +19,101 @@ from implementations.rsa import RSA
     ],
     ids=["english", "lorem", "special_characters"],
 )
-def test_rsa(plain_text):
-    encryptor = RSA(bit_size=512)
+def test_rsa(encryptor, plain_text):
+    output = encryptor.decrypt(
+        encryptor.encrypt(message=plain_text, pub_key=encryptor.get_public_key())
+    )
+    assert output == plain_text
+
+
+def test_rsa_supplied_keys(encryptor):
+    source = encryptor
+    encryptor = RSA(
+        bit_size=512, keys=[source.get_public_key(), source.get_private_key()]
+    )
+    plain_text = "Hello World"
+    output = encryptor.decrypt(
+        source.encrypt(message=plain_text, pub_key=source.get_public_key())
+    )
+    assert output == plain_text
+
+
+def test_rsa_long_message():
+    encryptor = RSA(bit_size=64)
+    plain_text = (
+        "Lorem ipsum dolor sit amet, consectetur adipiscing elit. "
+        + "Donec porta ipsum in porttitor sodales."
+    )
+    output = encryptor.decrypt(
+        encryptor.encrypt(message=plain_text, pub_key=encryptor.get_public_key())
+    )
+    assert output == plain_text
+
+
+def test_rsa_encrypt_batch():
+    encryptor = RSA(bit_size=64)
+    messages = ["Hello World", "", "A somewhat longer message than one block."]
+    ciphers = encryptor.encrypt_batch(messages, encryptor.get_public_key())
+    assert [encryptor.decrypt(cipher) for cipher in ciphers] == messages
+
+
+@pytest.mark.parametrize("fast_mode", [True, False])
+def test_rsa_supplied_primes(fast_mode):
+    # Mersenne primes; 65537 divides 2^n - 1 only when 32 divides n, so e is
+    # coprime to (p - 1) * (q - 1).
+    [p, q] = [2**61 - 1, 2**89 - 1]
+    N, e = p * q, 65537
+    d = nt.get_mod_inverse(e, (p - 1) * (q - 1))
+    encryptor = RSA(keys=[[N, e], [N, d, p, q]], fast_mode=fast_mode)
+    plain_text = "Hello World"
+    output = encryptor.decrypt(
+        encryptor.encrypt(message=plain_text, pub_key=encryptor.get_public_key())
+    )
+    assert output == plain_text
+    assert encryptor.get_private_key() == (N, d)
+
+
+def test_rsa_supplied_primes_mismatch():
+    with pytest.raises(ValueError):
+        RSA(keys=[[35, 5], [35, 5, 3, 7]])
+
+
+def test_rsa_smallest_modulus():
+    # 323 = 17 * 19 is just big enough for one character per block.
+    encryptor = RSA(keys=[[323, 5], [323, 173]])
+    plain_text = "Hello World"
+    output = encryptor.decrypt(
+        encryptor.encrypt(message=plain_text, pub_key=encryptor.get_public_key())
+    )
+    assert output == plain_text
+
+
+def test_rsa_modulus_too_small():
+    encryptor = RSA(keys=[[143, 7], [143, 103]])
+    with pytest.raises(ValueError):
+        encryptor.encrypt(message="a", pub_key=encryptor.get_public_key())
+
+
+def test_rsa_negative_cipher():
+    with pytest.raises(ValueError):
+        RSA(keys=[[323, 5], [323, 173]]).decrypt(-1)
+
+
+def test_rsa_without_fast_mode():
+    encryptor = RSA(bit_size=64, fast_mode=False)
+    plain_text = "Hello World"
+    output = encryptor.decrypt(
+        encryptor.encrypt(message=plain_text, pub_key=encryptor.get_public_key())
+    )
+    assert output == plain_text
+
+
+def test_rsa_small_bit_size():
+    encryptor = RSA(bit_size=4)
+    plain_text = "Hello World"
     output = encryptor.decrypt(
         encryptor.encrypt(message=plain_text, pub_key=encryptor.get_public_key())
     )
     assert output == plain_text
+    with pytest.raises(ValueError):
+        RSA(bit_size=3)